@@ -1,11 +1,17 @@
 import click
 
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
+from branch_detective.commits import CommitLog, Normalization
 from branch_detective.description import markdown_description
 from branch_detective.repository import RepositoryLens
-from branch_detective.compare import find_missing_by_message, find_missing_by_sha
+from branch_detective.compare import (
+    compare_both, find_missing_by_message, find_missing_by_sha, in_range,
+    iter_missing_by_message, iter_missing_by_sha
+)
+from branch_detective.export import export_commit_log
+from branch_detective.pager import Pager, echo_all
 
 
 def overwrite(message: str, nl: bool = False) -> None:
@@ -31,6 +37,15 @@ def verify_date(date: str, arg_name: str) -> Optional[datetime]:
         return None
 
 
+def show_commits(commits: CommitLog, show_all: bool, page_size: int) -> bool:
+    """Display the commits a page at a time, or all at once if show_all is
+    set. Returns False if the user stopped paging early."""
+    if show_all:
+        echo_all(commits)
+        return True
+    return Pager(commits, page_size, commits.load_messages).run()
+
+
 @click.command(help="""branch-detective examines a Git repository to determine
 which commits are present on a SOURCE branch, but are absent from a DEST
 branch.""")
@@ -46,6 +61,26 @@ branch.""")
     '--by-message/--by-sha', default=True,
     help='search for duplicates by commit message or by commit sha'
 )
+@click.option(
+    '-t', '--match-trailer', 'trailer_keys', multiple=True,
+    help="also match commits by this trailer (e.g. 'Change-Id'); repeatable"
+)
+@click.option(
+    '--collapse-whitespace', is_flag=True, default=False,
+    help="ignore whitespace differences when comparing commit messages"
+)
+@click.option(
+    '--strip-trailers', is_flag=True, default=False,
+    help="ignore trailers (e.g. 'Signed-off-by:') when comparing commit messages"
+)
+@click.option(
+    '--ignore-case', is_flag=True, default=False,
+    help="ignore letter case when comparing commit messages"
+)
+@click.option(
+    '--both', '--symmetric', 'both', is_flag=True, default=False,
+    help="also show commits missing in the source branch, and matched commits"
+)
 @click.option(
     '-s', '--since', default=None,
     help="the date (as 'YYYY-MM-DD') before which commits should be ignored."
@@ -62,6 +97,18 @@ branch.""")
     '-a', '--show-all', is_flag=True, default=False,
     help="automatically display all missing commits instead of paging"
 )
+@click.option(
+    '-n', '--page-size', default=10, type=int,
+    help="the number of missing commits to display per page"
+)
+@click.option(
+    '-c', '--count', is_flag=True, default=False,
+    help="only show the number of missing commits"
+)
+@click.option(
+    '-o', '--export', 'export_path', default=None,
+    help="export the source branch's commits to a columnar file for analysis"
+)
 @click.option(
     '-m', '--markdown', is_flag=True, default=False,
     help="create a markdown description from the commit messages"
@@ -69,9 +116,11 @@ branch.""")
 @click.pass_context
 def main(
     ctx, source_branch: str, dest_branch: str,
-    by_message: bool, ignore_merge: bool,
+    by_message: bool, both: bool, trailer_keys: Tuple[str, ...],
+    ignore_merge: bool,
+    collapse_whitespace: bool, strip_trailers: bool, ignore_case: bool,
     since: str, before: str,
-    show_all: bool, markdown: bool
+    show_all: bool, page_size: int, count: bool, export_path: Optional[str], markdown: bool
 ):
     try:
         since_dt: Optional[datetime] = verify_date(since, '--since')
@@ -84,7 +133,13 @@ def main(
     overwrite("Examining branches...", nl=False)
 
     try:
-        repo = RepositoryLens(source_branch, dest_branch)
+        repo = RepositoryLens(
+            source_branch, dest_branch,
+            Normalization(collapse_whitespace, strip_trailers, ignore_case),
+            # Commit messages are only needed for missing commits when
+            # comparing by SHA, so only load them on demand.
+            lazy=not by_message
+        )
         # update branches to those detected by the repository
         source_branch = repo.source_branch
         dest_branch = repo.dest_branch
@@ -98,19 +153,62 @@ def main(
 
     overwrite("Comparing commits...", nl=False)
 
-    if by_message:
+    # When paging, start showing missing commits while the comparison is
+    # still running in the background.
+    if not (both or show_all or count or export_path or markdown):
+        find = iter_missing_by_message if by_message else iter_missing_by_sha
+        overwrite(
+            f"Commits from {source_branch} missing in {dest_branch}:", nl=True
+        )
+        pager = Pager(
+            find(
+                source_log, dest_log, ignore_merge=ignore_merge,
+                since=since_dt, before=before_dt, trailer_keys=trailer_keys
+            ),
+            page_size, source_log.load_messages
+        )
+        # Once all the pages were shown (or there were none), the comparison
+        # is finished, so the final count is known.
+        if pager.run():
+            click.echo(
+                f"{len(pager.wait())} commits from {source_branch} "
+                f"missing in {dest_branch}"
+            )
+        return
+
+    if both:
+        comparison = compare_both(
+            source_log, dest_log, by_message=by_message,
+            ignore_merge=ignore_merge, since=since_dt, before=before_dt,
+            trailer_keys=trailer_keys
+        )
+        missing = comparison.source_only
+    elif by_message:
         missing = find_missing_by_message(
             source_log, dest_log, ignore_merge=ignore_merge,
-            since=since_dt, before=before_dt
+            since=since_dt, before=before_dt, trailer_keys=trailer_keys
         )
     else:
         missing = find_missing_by_sha(
             source_log, dest_log, ignore_merge=ignore_merge,
-            since=since_dt, before=before_dt
+            since=since_dt, before=before_dt, trailer_keys=trailer_keys
+        )
+
+    if export_path:
+        # Commits are matched if they were compared, and weren't missing.
+        missing_shas = {commit.sha for commit in missing}
+        compared_shas = {
+            commit.sha for commit in source_log
+            if in_range(commit, ignore_merge, since_dt, before_dt)
+        }
+        export_commit_log(
+            source_log, export_path,
+            matched=compared_shas - missing_shas, compared=compared_shas
         )
 
     if markdown:
         overwrite("")
+        missing.load_messages()
         click.echo(
             markdown_description(missing)
         )
@@ -121,15 +219,30 @@ def main(
     click.echo(
         f"{len(missing)} commits from {source_branch} missing in {dest_branch}"
     )
+    if both:
+        click.echo(
+            f"{len(comparison.dest_only)} commits from {dest_branch} "
+            f"missing in {source_branch}"
+        )
+        click.echo(
+            f"{len(comparison.matched)} commits present in both branches"
+        )
+
+    if count:
+        return
+
+    if not show_commits(missing, show_all, page_size) or not both:
+        return
 
-    missing_count = len(missing)
-    for num, commit in enumerate(missing, start=1):
-        click.echo(f' {num} of {missing_count} '.center(50, '='))
-        click.echo()
-        click.echo(commit)
-        if (
-            not show_all and
-            not num == missing_count and
-            not click.confirm('Show next?', default=True)
-        ):
-            break
+    if comparison.dest_only:
+        click.echo(f' Missing in {source_branch} '.center(50, '#'))
+        if not show_commits(comparison.dest_only, show_all, page_size):
+            return
+
+    if comparison.matched:
+        click.echo(' Present in both '.center(50, '#'))
+        click.echo('\n'.join(
+            f"{match.source.sha[:10]} = {match.dest.sha[:10]} "
+            f"(by {match.how})"
+            for match in comparison.matched
+        ))
@@ -1,7 +1,25 @@
+import hashlib
 import re
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+# Retrieves the raw messages for the given SHAs, as a dictionary by SHA.
+MessageLoader = Callable[[List[str]], Dict[str, str]]
+
+
+class Normalization(NamedTuple):
+    """The normalization applied to commit messages before they are
+    fingerprinted. By default, messages must match exactly.
+
+    collapse_whitespace: treat any run of whitespace as a single space
+    strip_trailers: ignore a trailing block of trailers (see Commit.trailers)
+    casefold: ignore differences in letter case
+    """
+    collapse_whitespace: bool = False
+    strip_trailers: bool = False
+    casefold: bool = False
 
 
 class Commit:
@@ -10,23 +28,50 @@ class Commit:
 
     DATETIME_FORMAT_STR: str = '%a %b %d %H:%M:%S %Y %z'
     CHERRY_PICK_REGEX: str = r'\(cherry picked from commit \w+\)'
+    TRAILER_REGEX: str = r'^([\w-]+): (.+)$'
+    # Footers such as '(backported from commit abc123)', which are treated as
+    # trailers with keys such as 'backported-from'.
+    FOOTER_REGEX: str = r'^\(([\w ]+?) from (?:commit )?([^\s)]+)[^)]*\)$'
+    FOOTER_KEY_SUFFIX: str = '-from'
+    # Footers may refer to a commit by an abbreviated SHA, of at least as
+    # many digits as Git allows.
+    ABBREV_SHA_REGEX: str = r'^[0-9a-fA-F]{4,}$'
+    MIN_ABBREV_SHA: int = 4
+    FINGERPRINT_SIZE: int = 16
 
-    def __init__(self, raw_commit: str):
+    def __init__(
+        self, raw_commit: str,
+        normalization: Normalization = Normalization(),
+        loader: Optional[MessageLoader] = None
+    ):
         """Initiates a new commit object from the raw string output
         of 'git log'. Only picks up the following data:
         * SHA
         * Author
         * Date, as a datetime
-        * Merge (optional)
+        * Merge (optional), also parsed from a 'Parents:' field
+        * Parents (optional), parsed from a 'Parents:' field, or from the
+          'commit' line of 'git log --parents'
         * Message, sans "cherry pick" footers
-        * Cherry Pick (optional), parsed from first "cherry pick" footer
+        * Cherry Pick (optional), parsed from first "cherry pick" footer,
+          or from a 'CherryPick:' field
+        * Trailers (optional), parsed from the final paragraph of the message
+        * Fingerprint, a hash of the message after normalization
+
+        If the raw commit has no message, and a loader is provided, the
+        message (and thus the fingerprint) is only loaded when first needed.
+
+        normalization: how to normalize the message before fingerprinting
+        loader: retrieves the raw message, if it isn't in the raw commit
         """
 
         # Split the raw 'git log' data into lines.
         lines = [line for line in raw_commit.split('\n')]
 
-        # The first line is always the commit, in format 'commit THE_SHA_HERE'
+        # The first line is always the commit, in format 'commit THE_SHA_HERE',
+        # followed by the parents' SHAs if the log was made with '--parents'.
         self.sha = lines[0].split()[1]
+        self.parents: List[str] = lines[0].split()[2:]
 
         # Process headings first (any line starting with a "Key" and colon)
         headings = {}
@@ -61,26 +106,178 @@ class Commit:
             # it is reasonable for a commit to lack a Merge: field
             pass
 
-        # Parse out the commit message, removing leading whitespace, but
-        # preserving original line breaks.
+        # Header-only logs list all parents instead, so a commit with more
+        # than one parent is a merge.
+        if 'parents' in headings:
+            self.parents = headings['parents'].split()
+            if len(self.parents) > 1:
+                self.merge = ' '.join(self.parents)
+                self.is_merge = True
+
+        # Header-only logs can also provide the cherry pick directly.
+        self.cherry_pick: Optional[str] = headings.get('cherrypick')
+
+        self.normalization: Normalization = normalization
+        self._loader: Optional[MessageLoader] = loader
+        self._message: Optional[str] = None
+        self._normalized: Optional[str] = None
+        self._fingerprint: Optional[bytes] = None
+        self._trailers: Dict[str, List[str]] = {}
+
+        # Parse out the commit message, preserving original line breaks.
+        message_lines = [
+            line
+            for line in lines
+            if line.startswith('    ') or not line
+        ]
+        if any(message_lines) or loader is None:
+            self.set_message('\n'.join(message_lines))
+
+    def set_message(self, message: str) -> None:
+        """Store the raw commit message, parsing out the cherry pick from it
+        (optional), also removing it from the commit message itself.
+        """
+        # Remove leading whitespace from each line, whether the message came
+        # indented from 'git log' or as-is from a loader, so both read alike.
         message = '\n'.join(
-            (
-                line.lstrip(' ')
-                for line in lines
-                if line.startswith('    ') or not line
-            )
+            line.lstrip(' ') for line in message.split('\n')
+        ).strip()
+
+        if not self.cherry_pick:
+            self.cherry_pick = self.parse_cherry_pick(message)
+
+        self._message = re.sub(self.CHERRY_PICK_REGEX, '', message).strip()
+        self._trailers = self.parse_trailers(self._message)
+
+        # Normalize and fingerprint the message once, up front, so lookups by
+        # message don't have to repeatedly normalize or compare full strings.
+        self._normalized = self.normalize_message(
+            self._message, self.normalization
         )
-        message = message.strip()
+        self._fingerprint = self.hash_message(self._normalized)
+
+    @classmethod
+    def parse_cherry_pick(cls, message: str) -> Optional[str]:
+        """Return the SHA from the first "cherry pick" footer in the message,
+        or None if there is no such footer."""
+        cherry_pick = re.search(cls.CHERRY_PICK_REGEX, message)
+        if not cherry_pick:
+            return None
+        return cherry_pick.group().split('commit')[-1][:-1].strip()
+
+    @classmethod
+    def is_footer_sha(cls, key: str, value: str) -> bool:
+        """Whether the trailer is a footer (e.g. '(backported from commit
+        abc123)'), whose value is a (possibly abbreviated) SHA."""
+        return key.lower().endswith(cls.FOOTER_KEY_SUFFIX) and bool(
+            re.match(cls.ABBREV_SHA_REGEX, value)
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the commit message has been parsed or loaded yet."""
+        return self._message is not None
 
-        # Parse out the cherry pick from the commit message (optional),
-        # also removing it from the commit message itself.
-        self.cherry_pick: Optional[str] = None
-        cherry_pick = re.search(self.CHERRY_PICK_REGEX, message)
-        if cherry_pick:
-            cherry_pick = cherry_pick.group()
-            self.cherry_pick = cherry_pick.split('commit')[-1][:-1].strip()
+    @property
+    def message(self) -> str:
+        """The commit message, sans "cherry pick" footers, loading it first
+        if necessary. Prefer CommitLog.load_messages() to load many commits'
+        messages at once."""
+        if self._message is None:
+            self._load()
+        return self._message
 
-        self.message = re.sub(self.CHERRY_PICK_REGEX, '', message).strip()
+    @property
+    def normalized_message(self) -> str:
+        """The commit message after normalization, loading it if needed."""
+        if self._normalized is None:
+            self._load()
+        return self._normalized
+
+    @property
+    def fingerprint(self) -> bytes:
+        """A hash of the normalized commit message, loading it if needed."""
+        if self._fingerprint is None:
+            self._load()
+        return self._fingerprint
+
+    @property
+    def trailers(self) -> Dict[str, List[str]]:
+        """The values of each trailer (e.g. 'Change-Id:'), by lowercase key,
+        loading the message if needed."""
+        if self._message is None:
+            self._load()
+        return self._trailers
+
+    def _load(self) -> None:
+        """Load the commit message on its own."""
+        self.set_message(self._loader([self.sha])[self.sha])
+
+    @classmethod
+    def split_trailers(cls, message: str) -> Tuple[str, List[str]]:
+        """Split the message into its body and its trailer lines, if any.
+        Trailers are the final paragraph of the message, and consist only of
+        'Key: value' lines, or footers matching FOOTER_REGEX. The first
+        paragraph is never considered a trailer block, since it's the message
+        header.
+        """
+        paragraphs = message.rstrip().split('\n\n')
+        if len(paragraphs) > 1:
+            lines = paragraphs[-1].split('\n')
+            if all(
+                re.match(cls.TRAILER_REGEX, line) or
+                re.match(cls.FOOTER_REGEX, line)
+                for line in lines
+            ):
+                return '\n\n'.join(paragraphs[:-1]), lines
+        return message, []
+
+    @classmethod
+    def parse_trailers(cls, message: str) -> Dict[str, List[str]]:
+        """Return the values of each trailer in the message, by lowercase key.
+        """
+        trailers: Dict[str, List[str]] = {}
+        for line in cls.split_trailers(message)[1]:
+            trailer = re.match(cls.TRAILER_REGEX, line)
+            if trailer:
+                key, value = trailer.groups()
+            else:
+                key, value = re.match(cls.FOOTER_REGEX, line).groups()
+                key = f"{key.replace(' ', '-')}{cls.FOOTER_KEY_SUFFIX}"
+            trailers.setdefault(key.lower(), []).append(value.strip())
+        return trailers
+
+    @classmethod
+    def normalize_message(
+        cls, message: str,
+        normalization: Normalization = Normalization()
+    ) -> str:
+        """Return the commit message with the requested normalization
+        applied. The message should already have its cherry pick footer
+        removed, as is done in Commit.__init__().
+        """
+        if normalization.strip_trailers:
+            message = cls.split_trailers(message)[0]
+        if normalization.collapse_whitespace:
+            message = ' '.join(message.split())
+        if normalization.casefold:
+            message = message.casefold()
+        return message.strip()
+
+    @classmethod
+    def fingerprint_message(
+        cls, message: str,
+        normalization: Normalization = Normalization()
+    ) -> bytes:
+        """Return a fixed-size hash of the normalized commit message."""
+        return cls.hash_message(cls.normalize_message(message, normalization))
+
+    @classmethod
+    def hash_message(cls, normalized: str) -> bytes:
+        """Return a fixed-size hash of an already normalized message."""
+        return hashlib.blake2b(
+            normalized.encode('utf-8'), digest_size=cls.FINGERPRINT_SIZE
+        ).digest()
 
     def __str__(self) -> str:
         """Return the Commit as a string, similar to the output of 'git log',
@@ -99,19 +296,55 @@ class CommitLog:
     """A collection of Commit objects, parsed from the raw output of 'git log'.
     """
 
-    COMMIT_REGEX: str = r'commit \w+\n(?:\w+: .+\n)+\n(?:    .*\n)+'
+    COMMIT_REGEX: str = (
+        r'commit \w+(?: \w+)*\n(?:\w+: .*\n)+(?:\n(?:    .*\n)+)?'
+    )
 
-    def __init__(self, raw_log: Optional[str] = None):
+    def __init__(
+        self, raw_log: Optional[str] = None,
+        normalization: Normalization = Normalization(),
+        loader: Optional[MessageLoader] = None
+    ):
         """Create a new commit log, optionally initializing it from the raw
-        output of 'git log'.
+        output of 'git log'. If the log only contains commit headers, pass a
+        loader so commit messages can be loaded when they're needed.
+
+        raw_log: the raw output of 'git log'
+        normalization: how commit messages are normalized for comparison
+        loader: retrieves the raw messages of commits, by SHA
         """
+        self.normalization: Normalization = normalization
         self.commits: List[Commit] = []
+        # Commits indexed by message fingerprint, SHA, and cherry pick SHA,
+        # so lookups don't have to scan the whole log.
+        self._by_fingerprint: Dict[bytes, List[Commit]] = {}
+        self._by_sha: Dict[str, Commit] = {}
+        self._by_cherry_pick: Dict[str, Commit] = {}
+        # Commits whose messages haven't been loaded, and thus can't be
+        # indexed by fingerprint until a lookup by message is made.
+        self._unindexed: List[Commit] = []
+        # Commits indexed by (lowercase) trailer key and value, which is only
+        # built once a lookup by trailer is made.
+        self._by_trailer: Optional[Dict[Tuple[str, str], Commit]] = None
+        # Commits whose footers (e.g. '(backported from commit abc123)') refer
+        # to a SHA, indexed by footer key and the SHA's shortest abbreviation,
+        # so abbreviated SHAs can be matched. Built along with _by_trailer.
+        self._by_footer_sha: Dict[
+            Tuple[str, str], List[Tuple[str, Commit]]
+        ] = {}
+        # Commits indexed by the shortest abbreviation of their SHA, which is
+        # only built once a lookup by abbreviated SHA is made.
+        self._by_abbrev_sha: Optional[Dict[str, List[Commit]]] = None
 
         # If a raw log (string) was provided, parse out each commit
         # as a Commit object.
         if raw_log:
-            commits = re.findall(self.COMMIT_REGEX, raw_log)
-            self.commits = [Commit(commit) for commit in commits]
+            # GitPython strips the trailing newline from 'git log', which the
+            # last line of the last commit needs to be matched.
+            if not raw_log.endswith('\n'):
+                raw_log += '\n'
+            for commit in re.findall(self.COMMIT_REGEX, raw_log):
+                self.append(Commit(commit, normalization, loader))
 
     def __iter__(self):
         """Iterate over the commits, sorted by date (ascending)."""
@@ -127,23 +360,183 @@ class CommitLog:
         # note: cherry pick footers are removed from commit messages
         # during parsing in Commit.__init__(), so they won't cause
         # false negatives here.
-        for commit in self.commits:
-            if message == commit.message:
-                return True
-        return False
+        normalized = Commit.normalize_message(message, self.normalization)
+        return self._find_by_fingerprint(
+            Commit.hash_message(normalized), normalized
+        ) is not None
+
+    def includes_commit_by_fingerprint(self, commit: Commit) -> bool:
+        """Check for a commit with the same message as the given commit,
+        reusing the fingerprint computed when that commit was parsed."""
+        return self.find_commit_by_message(commit) is not None
 
     def includes_commit_by_sha(self, sha, include_cherry_pick=True):
         """Check for a commit based on its SHA."""
-        for commit in self.commits:
-            if sha == commit.sha:
-                return True
-            if include_cherry_pick and sha == commit.cherry_pick:
-                return True
+        if self.find_commit_by_sha(sha) is not None:
+            return True
+        if (
+            include_cherry_pick and
+            self.find_commit_by_cherry_pick(sha) is not None
+        ):
+            return True
         return False
 
+    def find_commit_by_message(self, commit: Commit) -> Optional[Commit]:
+        """Return the first commit with the same message as the given commit,
+        or None if there is no such commit."""
+        return self._find_by_fingerprint(
+            self.fingerprint_of(commit), self._normalized(commit)
+        )
+
+    def find_commit_by_sha(self, sha: str) -> Optional[Commit]:
+        """Return the commit with the given SHA, or None if there is no such
+        commit."""
+        return self._by_sha.get(sha)
+
+    def find_commit_by_abbrev_sha(self, sha: str) -> Optional[Commit]:
+        """Return the first commit whose SHA starts with the given (possibly
+        abbreviated) SHA, or None if there is no such commit."""
+        found = self.find_commit_by_sha(sha)
+        if found is not None or len(sha) < Commit.MIN_ABBREV_SHA:
+            return found
+        if self._by_abbrev_sha is None:
+            self._by_abbrev_sha = {}
+            for commit in self.commits:
+                self._index_abbrev_sha(commit)
+        sha = sha.lower()
+        for commit in self._by_abbrev_sha.get(
+            sha[:Commit.MIN_ABBREV_SHA], []
+        ):
+            if commit.sha.startswith(sha):
+                return commit
+        return None
+
+    def find_commit_by_cherry_pick(self, sha: str) -> Optional[Commit]:
+        """Return the first commit cherry picked from the given SHA, or None
+        if there is no such commit."""
+        return self._by_cherry_pick.get(sha)
+
+    def find_commit_by_trailer(self, key: str, value: str) -> Optional[Commit]:
+        """Return the first commit with the given trailer key (e.g.
+        'Change-Id') and value, or None if there is no such commit."""
+        self._build_trailer_index()
+        return self._by_trailer.get((key.lower(), value))
+
+    def find_commit_by_trailer_sha(
+        self, key: str, sha: str
+    ) -> Optional[Commit]:
+        """Return the first commit whose trailer with the given key refers to
+        the given (full) SHA, or None if there is no such commit. Footers such
+        as '(backported from commit abc123)' may abbreviate the SHA."""
+        found = self.find_commit_by_trailer(key, sha)
+        if found is not None:
+            return found
+        sha = sha.lower()
+        prefix = (key.lower(), sha[:Commit.MIN_ABBREV_SHA])
+        for abbrev, commit in self._by_footer_sha.get(prefix, []):
+            if sha.startswith(abbrev):
+                return commit
+        return None
+
+    def _build_trailer_index(self) -> None:
+        """Index all the commits by their trailers, if not done already."""
+        if self._by_trailer is None:
+            self.load_messages()
+            self._by_trailer = {}
+            for commit in self.commits:
+                self._index_trailers(commit)
+
+    def fingerprint_of(self, commit: Commit) -> bytes:
+        """Return the commit's fingerprint under this log's normalization,
+        only recomputing it if the commit was parsed with a different one."""
+        if commit.normalization == self.normalization:
+            return commit.fingerprint
+        return Commit.fingerprint_message(commit.message, self.normalization)
+
+    def _normalized(self, commit: Commit) -> str:
+        """Return the commit's message under this log's normalization,
+        only renormalizing it if the commit was parsed with a different one."""
+        if commit.normalization == self.normalization:
+            return commit.normalized_message
+        return Commit.normalize_message(commit.message, self.normalization)
+
+    def _find_by_fingerprint(
+        self, fingerprint: bytes, normalized: str
+    ) -> Optional[Commit]:
+        """Look up a normalized message by its fingerprint, verifying the
+        full normalized message on a hit, so a hash collision can't produce
+        a false match."""
+        if self._unindexed:
+            self.load_messages(self._unindexed)
+            for commit in self._unindexed:
+                self._index_fingerprint(commit)
+            self._unindexed = []
+
+        candidates = self._by_fingerprint.get(fingerprint)
+        if not candidates:
+            return None
+
+        for commit in candidates:
+            if normalized == self._normalized(commit):
+                return commit
+        return None
+
     def append(self, commit: Commit) -> None:
         """Store a commit."""
         self.commits.append(commit)
+        if commit.is_loaded:
+            self._index_fingerprint(commit)
+        else:
+            self._unindexed.append(commit)
+        self._by_sha.setdefault(commit.sha, commit)
+        if commit.cherry_pick:
+            self._by_cherry_pick.setdefault(commit.cherry_pick, commit)
+        if self._by_trailer is not None:
+            self._index_trailers(commit)
+        if self._by_abbrev_sha is not None:
+            self._index_abbrev_sha(commit)
+
+    def _index_abbrev_sha(self, commit: Commit) -> None:
+        """Index a commit by the shortest abbreviation of its SHA."""
+        self._by_abbrev_sha.setdefault(
+            commit.sha[:Commit.MIN_ABBREV_SHA].lower(), []
+        ).append(commit)
+
+    def _index_trailers(self, commit: Commit) -> None:
+        """Index a commit by each of its trailers' keys and values."""
+        for key, values in commit.trailers.items():
+            for value in values:
+                self._by_trailer.setdefault((key, value), commit)
+                # Only footers are indexed by SHA prefix, as other trailers'
+                # values (e.g. 'Bug: 1234') may merely look like SHAs.
+                if Commit.is_footer_sha(key, value):
+                    value = value.lower()
+                    self._by_footer_sha.setdefault(
+                        (key, value[:Commit.MIN_ABBREV_SHA]), []
+                    ).append((value, commit))
+
+    def _index_fingerprint(self, commit: Commit) -> None:
+        """Index a commit by its fingerprint under this log's normalization.
+        """
+        self._by_fingerprint.setdefault(
+            self.fingerprint_of(commit), []
+        ).append(commit)
+
+    def load_messages(self, commits: Optional[Iterable[Commit]] = None) -> None:
+        """Load the messages of the given commits (by default, all commits in
+        the log) which haven't been loaded yet, in one batch per loader."""
+        if commits is None:
+            commits = self.commits
+
+        pending: Dict[MessageLoader, List[Commit]] = {}
+        for commit in commits:
+            if not commit.is_loaded:
+                pending.setdefault(commit._loader, []).append(commit)
+
+        for loader, batch in pending.items():
+            messages = loader([commit.sha for commit in batch])
+            for commit in batch:
+                commit.set_message(messages[commit.sha])
 
     def sort_by_date(self) -> None:
         """Sort the commits in the commit log by date (ascending).
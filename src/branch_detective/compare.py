@@ -1,13 +1,14 @@
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
-from branch_detective.commits import CommitLog
+from branch_detective.commits import Commit, CommitLog
 
 
 def find_missing_by_message(
     source: CommitLog, dest: CommitLog,
     ignore_merge: bool = False,
-    since: Optional[datetime] = None, before: Optional[datetime] = None
+    since: Optional[datetime] = None, before: Optional[datetime] = None,
+    trailer_keys: Sequence[str] = ()
 ) -> CommitLog:
     """Find the commits that are present in 'source', but absent in 'dest',
     using the commit message for lookup.
@@ -17,9 +18,30 @@ def find_missing_by_message(
     ignore_merge: whether to ignore merge commits (default False)
     since: if defined, the date before which (source) commits are ignored.
     before: if defined, the date after which (source) commits are ignored.
+    trailer_keys: the trailers (e.g. 'Change-Id') which also identify commits
     """
 
-    missing_commits = CommitLog()
+    missing_commits = CommitLog(normalization=source.normalization)
+    for commit in iter_missing_by_message(
+        source, dest, ignore_merge, since, before, trailer_keys
+    ):
+        missing_commits.append(commit)
+    return missing_commits
+
+
+def iter_missing_by_message(
+    source: CommitLog, dest: CommitLog,
+    ignore_merge: bool = False,
+    since: Optional[datetime] = None, before: Optional[datetime] = None,
+    trailer_keys: Sequence[str] = ()
+) -> Iterator[Commit]:
+    """Like find_missing_by_message(), but yield the missing commits (sorted
+    by date) as they're found, so they can be shown before the comparison
+    is finished."""
+
+    # Load any messages which haven't been yet in one batch, rather than
+    # one commit at a time as they're compared.
+    source.load_messages()
 
     # Look through all the commits in the source log
     for commit in source:
@@ -33,21 +55,46 @@ def find_missing_by_message(
         if since and commit.date < since:
             continue
 
-        # Search the destination log for the commit message being considered.
-        if not dest.includes_commit_by_message(commit.message):
-            # If the commit is missing in destination, track it.
-            missing_commits.append(commit)
+        # Search the destination log for the commit message being considered,
+        # and failing that, for any of its trailers.
+        if dest.includes_commit_by_fingerprint(commit):
+            continue
+        if trailer_keys and _match_by_trailer(commit, dest, trailer_keys):
+            continue
 
-    return missing_commits
+        # If the commit is missing in destination, yield it.
+        yield commit
 
 
 def find_missing_by_sha(
     source: CommitLog, dest: CommitLog,
     ignore_merge: bool = False,
-    since: datetime = None, before: datetime = None
+    since: datetime = None, before: datetime = None,
+    trailer_keys: Sequence[str] = ()
 ) -> CommitLog:
 
-    missing_commits = CommitLog()
+    missing_commits = CommitLog(normalization=source.normalization)
+    for commit in iter_missing_by_sha(
+        source, dest, ignore_merge, since, before, trailer_keys
+    ):
+        missing_commits.append(commit)
+
+    missing_commits.sort_by_date()
+    return missing_commits
+
+
+def iter_missing_by_sha(
+    source: CommitLog, dest: CommitLog,
+    ignore_merge: bool = False,
+    since: datetime = None, before: datetime = None,
+    trailer_keys: Sequence[str] = ()
+) -> Iterator[Commit]:
+    """Like find_missing_by_sha(), but yield the missing commits (sorted by
+    date) as they're found."""
+
+    # Trailers are parsed from the messages, so load them in one batch.
+    if trailer_keys:
+        source.load_messages()
 
     for commit in source:
         if ignore_merge and commit.is_merge:
@@ -56,8 +103,179 @@ def find_missing_by_sha(
             continue
         if before and commit.date > before:
             continue
-        if not dest.includes_commit_by_sha(commit.sha):
-            missing_commits.append(commit)
+        if dest.includes_commit_by_sha(commit.sha):
+            continue
+        if trailer_keys and _match_by_trailer(commit, dest, trailer_keys):
+            continue
+        yield commit
 
-    missing_commits.sort_by_date()
-    return missing_commits
+
+MATCH_SHA: str = 'sha'
+MATCH_CHERRY_PICK: str = 'cherry-pick'
+MATCH_MESSAGE: str = 'message'
+
+
+class Match(NamedTuple):
+    """A pair of equivalent commits from the source and dest logs, and how
+    they were matched: one of MATCH_SHA, MATCH_CHERRY_PICK, or MATCH_MESSAGE,
+    or else the (lowercase) key of the trailer which matched, e.g. 'change-id'.
+    """
+    source: Commit
+    dest: Commit
+    how: str
+
+
+class Comparison(NamedTuple):
+    """The result of comparing two commit logs in both directions."""
+    source_only: CommitLog
+    dest_only: CommitLog
+    matched: List[Match]
+
+
+def in_range(
+    commit: Commit,
+    ignore_merge: bool,
+    since: Optional[datetime], before: Optional[datetime]
+) -> bool:
+    """Whether the commit should be considered at all, given the filters."""
+    if ignore_merge and commit.is_merge:
+        return False
+    if since and commit.date < since:
+        return False
+    if before and commit.date > before:
+        return False
+    return True
+
+
+def _match_by_sha(
+    commit: Commit, other: CommitLog
+) -> Optional[Tuple[Commit, str]]:
+    """Find the commit in 'other' with the same SHA as 'commit', or which was
+    cherry picked from it, along with how it was matched."""
+    found = other.find_commit_by_sha(commit.sha)
+    if found is not None:
+        return found, MATCH_SHA
+    found = other.find_commit_by_cherry_pick(commit.sha)
+    if found is not None:
+        return found, MATCH_CHERRY_PICK
+    return None
+
+
+def _match_by_message(
+    commit: Commit, other: CommitLog
+) -> Optional[Tuple[Commit, str]]:
+    """Find the commit in 'other' with the same message as 'commit', along
+    with the most specific description of how the two are related."""
+    found = other.find_commit_by_message(commit)
+    if found is None:
+        return None
+    if found.sha == commit.sha:
+        return found, MATCH_SHA
+    if commit.sha == found.cherry_pick or found.sha == commit.cherry_pick:
+        return found, MATCH_CHERRY_PICK
+    return found, MATCH_MESSAGE
+
+
+def _match_by_trailer(
+    commit: Commit, other: CommitLog, trailer_keys: Sequence[str]
+) -> Optional[Tuple[Commit, str]]:
+    """Find the commit in 'other' with the same value as 'commit' for any of
+    the given trailers (e.g. the same 'Change-Id'), whose footer refers to
+    the commit's SHA, or whose SHA the commit's footer refers to (e.g.
+    '(backported from ...)'), along with the key of the trailer which
+    matched."""
+    for key in trailer_keys:
+        key = key.lower()
+        for value in commit.trailers.get(key, []):
+            found = other.find_commit_by_trailer(key, value)
+            if found is None and Commit.is_footer_sha(key, value):
+                found = other.find_commit_by_abbrev_sha(value)
+            if found is not None:
+                return found, key
+        found = other.find_commit_by_trailer_sha(key, commit.sha)
+        if found is not None:
+            return found, key
+    return None
+
+
+def compare_both(
+    source: CommitLog, dest: CommitLog,
+    by_message: bool = True,
+    ignore_merge: bool = False,
+    since: Optional[datetime] = None, before: Optional[datetime] = None,
+    trailer_keys: Sequence[str] = ()
+) -> Comparison:
+    """Compare 'source' and 'dest' in both directions at once, finding the
+    commits only present in 'source', those only present in 'dest', and the
+    pairs of commits present in both. This is equivalent to running
+    find_missing_by_message() or find_missing_by_sha() with the logs one way
+    around, and then swapped, but each log is only built and indexed once.
+    The one difference is that a commit already matched in either direction
+    (e.g. via a cherry pick footer on either side) is never reported as
+    missing.
+
+    source: the CommitLog commits are coming from
+    dest: the CommitLog we're looking for missing commits in
+    by_message: whether to match by commit message (default) or by SHA
+    ignore_merge: whether to ignore merge commits (default False)
+    since: if defined, the date before which commits are ignored.
+    before: if defined, the date after which commits are ignored.
+    trailer_keys: the trailers (e.g. 'Change-Id') which also identify commits
+    """
+    match_primary = _match_by_message if by_message else _match_by_sha
+    if by_message or trailer_keys:
+        source.load_messages()
+        dest.load_messages()
+
+    def match(
+        commit: Commit, other: CommitLog
+    ) -> Optional[Tuple[Commit, str]]:
+        found = match_primary(commit, other)
+        if found is None and trailer_keys:
+            found = _match_by_trailer(commit, other, trailer_keys)
+        return found
+
+    source_only = CommitLog(normalization=source.normalization)
+    dest_only = CommitLog(normalization=dest.normalization)
+    matched: List[Match] = []
+    # The (source, dest) SHAs of every pair matched so far, so pairs found
+    # in both directions are only reported once.
+    paired: Set[Tuple[str, str]] = set()
+    paired_source: Set[str] = set()
+    paired_dest: Set[str] = set()
+    # Source commits unmatched in the first pass, which may still be matched
+    # from the dest side, so source_only is only built after both passes.
+    unmatched_source: List[Commit] = []
+
+    for commit in source:
+        if not in_range(commit, ignore_merge, since, before):
+            continue
+        found = match(commit, dest)
+        if found is None:
+            unmatched_source.append(commit)
+            continue
+        other, how = found
+        matched.append(Match(commit, other, how))
+        paired.add((commit.sha, other.sha))
+        paired_source.add(commit.sha)
+        paired_dest.add(other.sha)
+
+    for commit in dest:
+        if not in_range(commit, ignore_merge, since, before):
+            continue
+        found = match(commit, source)
+        if found is None:
+            if commit.sha not in paired_dest:
+                dest_only.append(commit)
+            continue
+        other, how = found
+        if (other.sha, commit.sha) not in paired:
+            matched.append(Match(other, commit, how))
+            paired.add((other.sha, commit.sha))
+            paired_source.add(other.sha)
+
+    for commit in unmatched_source:
+        if commit.sha not in paired_source:
+            source_only.append(commit)
+    matched.sort(key=lambda pair: pair.source.date)
+    return Comparison(source_only, dest_only, matched)
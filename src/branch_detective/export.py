@@ -0,0 +1,325 @@
+import mmap
+import struct
+import sys
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from branch_detective.commits import Commit, CommitLog, Normalization
+
+
+class ColumnarLog:
+    """A read-only view of a commit log exported by export_commit_log(),
+    memory-mapped so that columns are read straight out of the file.
+    It is meant for analysis only: commit messages aren't exported, so it
+    can't be compared against another branch as a CommitLog can.
+
+    The file consists of a fixed header, followed by one column per field,
+    each padded to 8 bytes:
+    * dates: seconds since the epoch (int64)
+    * utc_offsets: the commit's UTC offset, in seconds (int32)
+    * authors: the author, as an ID in the string table (uint32)
+    * merges: the merge parents, as a string ID, or NO_STRING (uint32)
+    * cherry_picks: the cherry pick SHA, as a string ID, or NO_STRING (uint32)
+    * parents: the space-separated parent SHAs, as a string ID, or NO_STRING
+      for commits with no (known) parents (uint32)
+    * flags: FLAG_MERGE, FLAG_FINGERPRINT, FLAG_MATCHED, and FLAG_COMPARED
+      (uint8)
+    * SHAs: the binary SHAs (sha_size bytes each)
+    * fingerprints: the message fingerprints (fingerprint_size bytes each)
+    * string offsets: where each string starts in the string data (uint32)
+    * string data: the UTF-8 encoded strings, back to back
+    """
+
+    MAGIC: bytes = b'BDLOG002'
+    # magic, byte order, SHA size, fingerprint size, normalization,
+    # commit count, string count, string data size
+    HEADER_FORMAT: str = '<8sBBBBIII'
+    NO_STRING: int = 0xFFFFFFFF
+
+    FLAG_MERGE: int = 1
+    FLAG_FINGERPRINT: int = 2
+    FLAG_MATCHED: int = 4
+    FLAG_COMPARED: int = 8
+
+    def __init__(self, path: str):
+        """Open and memory-map an exported commit log.
+
+        path: the file written by export_commit_log()
+        """
+        with open(path, 'rb') as file:
+            try:
+                self._mmap = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except ValueError:
+                # Empty files can't be mapped.
+                raise RuntimeError(f"{path} is not an exported commit log.")
+
+        header_size = struct.calcsize(self.HEADER_FORMAT)
+        if len(self._mmap) < header_size:
+            self._mmap.close()
+            raise RuntimeError(f"{path} is not an exported commit log.")
+        (
+            magic, byteorder, self.sha_size, self.fingerprint_size,
+            normalization, count, string_count, strings_size
+        ) = struct.unpack_from(self.HEADER_FORMAT, self._mmap)
+
+        if magic != self.MAGIC:
+            self._mmap.close()
+            raise RuntimeError(f"{path} is not an exported commit log.")
+        if byteorder != _BYTEORDERS.index(sys.byteorder):
+            self._mmap.close()
+            raise RuntimeError(
+                f"{path} was exported on a machine with different byte order."
+            )
+
+
+        # The header tells how large each column is, so make sure the file
+        # isn't truncated (or padded) before slicing the columns out of it.
+        column_sizes = [
+            count * 8, count * 4, count * 4, count * 4, count * 4, count * 4,
+            count,
+            count * self.sha_size, count * self.fingerprint_size,
+            (string_count + 1) * 4, strings_size
+        ]
+        expected_size = header_size + sum(map(_padded, column_sizes))
+        actual_size = len(self._mmap)
+        if actual_size != expected_size:
+            self._mmap.close()
+            raise RuntimeError(
+                f"{path} is {actual_size} bytes, but should be "
+                f"{expected_size} bytes. It may be truncated."
+            )
+
+        self.normalization: Normalization = Normalization(
+            *(bool(normalization & 1 << bit) for bit in range(3))
+        )
+        self._count: int = count
+
+        # Slice each column out of the mapped file, without copying it.
+        view = memoryview(self._mmap)
+        self._views: List[memoryview] = [view]
+        offset = header_size
+
+        def column(size: int, fmt: str = 'B') -> memoryview:
+            nonlocal offset
+            col = view[offset:offset + size].cast(fmt)
+            self._views.append(col)
+            offset += _padded(size)
+            return col
+
+        self.dates: memoryview = column(count * 8, 'q')
+        self.utc_offsets: memoryview = column(count * 4, 'i')
+        self.authors: memoryview = column(count * 4, 'I')
+        self.merges: memoryview = column(count * 4, 'I')
+        self.cherry_picks: memoryview = column(count * 4, 'I')
+        self.parent_lists: memoryview = column(count * 4, 'I')
+        self.flags: memoryview = column(count)
+        self._shas_start: int = offset
+        self._shas: memoryview = column(count * self.sha_size)
+        self._fingerprints: memoryview = column(
+            count * self.fingerprint_size
+        )
+        self._string_offsets: memoryview = column((string_count + 1) * 4, 'I')
+        self._strings: memoryview = column(strings_size)
+
+    def __len__(self) -> int:
+        """Returns the number of commits in the log."""
+        return self._count
+
+    def __enter__(self) -> 'ColumnarLog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the columns and unmap the file."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def string(self, string_id: int) -> Optional[str]:
+        """Return a string from the string table, or None for NO_STRING."""
+        if string_id == self.NO_STRING:
+            return None
+        start = self._string_offsets[string_id]
+        end = self._string_offsets[string_id + 1]
+        return bytes(self._strings[start:end]).decode('utf-8')
+
+    def sha(self, index: int) -> str:
+        """Return the SHA of the commit at the given index."""
+        start = index * self.sha_size
+        return self._shas[start:start + self.sha_size].hex()
+
+    def date(self, index: int) -> datetime:
+        """Return the date of the commit at the given index."""
+        return datetime.fromtimestamp(
+            self.dates[index],
+            timezone(timedelta(seconds=self.utc_offsets[index]))
+        )
+
+    def author(self, index: int) -> str:
+        """Return the author of the commit at the given index."""
+        return self.string(self.authors[index])
+
+    def merge(self, index: int) -> Optional[str]:
+        """Return the merge parents of the commit at the given index."""
+        return self.string(self.merges[index])
+
+    def cherry_pick(self, index: int) -> Optional[str]:
+        """Return the SHA the commit at the given index was cherry picked
+        from, if any."""
+        return self.string(self.cherry_picks[index])
+
+    def parents(self, index: int) -> List[str]:
+        """Return the parent SHAs of the commit at the given index, which is
+        empty for root commits, or if the log didn't include parents."""
+        parents = self.string(self.parent_lists[index])
+        return parents.split() if parents else []
+
+    def fingerprint(self, index: int) -> Optional[bytes]:
+        """Return the message fingerprint of the commit at the given index,
+        or None if its message wasn't loaded when it was exported."""
+        if not self.flags[index] & self.FLAG_FINGERPRINT:
+            return None
+        start = index * self.fingerprint_size
+        return bytes(self._fingerprints[start:start + self.fingerprint_size])
+
+    def is_merge(self, index: int) -> bool:
+        """Whether the commit at the given index is a merge commit."""
+        return bool(self.flags[index] & self.FLAG_MERGE)
+
+    def is_matched(self, index: int) -> bool:
+        """Whether the commit at the given index was marked as matched."""
+        return bool(self.flags[index] & self.FLAG_MATCHED)
+
+    def is_compared(self, index: int) -> bool:
+        """Whether the commit at the given index was compared at all, rather
+        than filtered out (e.g. as a merge, or by date). Commits which weren't
+        compared are never matched, but aren't missing either."""
+        return bool(self.flags[index] & self.FLAG_COMPARED)
+
+    def find_sha(self, sha: str) -> Optional[int]:
+        """Return the index of the commit with the given SHA, or None if
+        there is no such commit. Searches the mapped SHA column directly."""
+        binsha = bytes.fromhex(sha)
+        if len(binsha) != self.sha_size:
+            return None
+
+        start = self._shas_start
+        end = start + self._count * self.sha_size
+        while True:
+            found = self._mmap.find(binsha, start, end)
+            if found == -1:
+                return None
+            # Only count matches aligned to the start of a SHA.
+            index, remainder = divmod(found - self._shas_start, self.sha_size)
+            if not remainder:
+                return index
+            start = found + 1
+
+
+def export_commit_log(
+    log: CommitLog, path: str,
+    matched: Optional[Iterable[str]] = None,
+    compared: Optional[Iterable[str]] = None
+) -> None:
+    """Write the commit log to a compact, columnar file, which can be reopened
+    (without parsing) as a ColumnarLog. Commit messages aren't exported, and
+    fingerprints are only exported for commits whose messages were loaded.
+
+    log: the CommitLog to export
+    path: the file to write
+    matched: the SHAs of the commits to mark as matched
+    compared: the SHAs of the commits to mark as compared (default all)
+    """
+    matched = set(matched or ())
+    compared = None if compared is None else set(compared)
+    commits = list(log)
+
+    sha_size = len(commits[0].sha) // 2 if commits else 20
+    if any(len(commit.sha) != sha_size * 2 for commit in commits):
+        raise RuntimeError("Cannot export commits with mixed SHA lengths.")
+
+    # Deduplicate the strings (authors, merges, cherry picks, parents) by ID.
+    string_ids: Dict[str, int] = {}
+
+    def string_id(string: Optional[str]) -> int:
+        if string is None:
+            return ColumnarLog.NO_STRING
+        return string_ids.setdefault(string, len(string_ids))
+
+    dates = array('q')
+    utc_offsets = array('i')
+    authors = array('I')
+    merges = array('I')
+    cherry_picks = array('I')
+    parents = array('I')
+    flags = array('B')
+    shas = bytearray()
+    fingerprints = bytearray()
+    no_fingerprint = bytes(Commit.FINGERPRINT_SIZE)
+
+    for commit in commits:
+        dates.append(int(commit.date.timestamp()))
+        utc_offsets.append(int(commit.date.utcoffset().total_seconds()))
+        authors.append(string_id(commit.author))
+        merges.append(string_id(commit.merge))
+        cherry_picks.append(string_id(commit.cherry_pick))
+        parents.append(string_id(' '.join(commit.parents) or None))
+        shas += bytes.fromhex(commit.sha)
+
+        flag = 0
+        if commit.is_merge:
+            flag |= ColumnarLog.FLAG_MERGE
+        if commit.sha in matched:
+            flag |= ColumnarLog.FLAG_MATCHED
+        if compared is None or commit.sha in compared:
+            flag |= ColumnarLog.FLAG_COMPARED
+        # Don't force lazily-parsed messages to load just to export them.
+        if commit.is_loaded:
+            flag |= ColumnarLog.FLAG_FINGERPRINT
+            # Fingerprint under the log's normalization, which is the one
+            # recorded in the header, even if the commit was parsed with
+            # another.
+            fingerprints += log.fingerprint_of(commit)
+        else:
+            fingerprints += no_fingerprint
+        flags.append(flag)
+
+    strings = bytearray()
+    string_offsets = array('I', [0])
+    for string in string_ids:
+        strings += string.encode('utf-8')
+        string_offsets.append(len(strings))
+
+    normalization = sum(
+        1 << bit for bit, enabled in enumerate(log.normalization) if enabled
+    )
+    header = struct.pack(
+        ColumnarLog.HEADER_FORMAT, ColumnarLog.MAGIC,
+        _BYTEORDERS.index(sys.byteorder), sha_size, Commit.FINGERPRINT_SIZE,
+        normalization, len(commits), len(string_ids), len(strings)
+    )
+
+    with open(path, 'wb') as file:
+        file.write(header)
+        for column in (
+            dates, utc_offsets, authors, merges, cherry_picks, parents, flags,
+            shas, fingerprints, string_offsets, strings
+        ):
+            data = bytes(column)
+            file.write(data)
+            file.write(bytes(_padded(len(data)) - len(data)))
+
+
+_BYTEORDERS = ('little', 'big')
+
+
+def _padded(size: int) -> int:
+    """Round the size up to the next multiple of 8 bytes."""
+    return (size + 7) // 8 * 8
@@ -0,0 +1,162 @@
+import click
+import threading
+
+from typing import Callable, Iterable, List, Optional
+
+from branch_detective.commits import Commit, CommitLog
+
+
+def echo_all(commits: CommitLog, batch_size: int = 256) -> None:
+    """Display all the commits at once, writing them in batches instead of
+    one line at a time, so large outputs are written quickly."""
+    # Load all the messages in one batch, instead of one at a time.
+    commits.load_messages()
+
+    count = len(commits)
+    chunk: List[str] = []
+    for num, commit in enumerate(commits, start=1):
+        chunk.append(f' {num} of {count} '.center(50, '='))
+        chunk.append('')
+        chunk.append(str(commit))
+        if num % batch_size == 0:
+            click.echo('\n'.join(chunk))
+            chunk = []
+    if chunk:
+        click.echo('\n'.join(chunk))
+
+
+class Pager:
+    """Displays commits a page at a time, allowing the user to move between
+    pages, jump to a commit, or search. The commits are collected in the
+    background, so the first page can be shown while they're still being
+    found (e.g. while the branches are still being compared).
+    """
+
+    PROMPT: str = "[Enter] next, [p]revious, [#] go to, [/text] search, [q]uit"
+
+    def __init__(
+        self, commits: Iterable[Commit], page_size: int = 10,
+        load_messages: Optional[Callable[[List[Commit]], None]] = None
+    ):
+        """Create a new pager, and start collecting the commits to display.
+
+        commits: the commits to display, in order
+        page_size: the number of commits to display at once
+        load_messages: loads the messages for the commits on each page
+        """
+        self.page_size: int = max(1, page_size)
+        self._load_messages = load_messages
+        self._found: List[Commit] = []
+        self._done: bool = False
+        self._error: Optional[BaseException] = None
+        self._changed = threading.Condition()
+
+        self._thread = threading.Thread(
+            target=self._collect, args=(commits,), daemon=True
+        )
+        self._thread.start()
+
+    def _collect(self, commits: Iterable[Commit]) -> None:
+        """Collect the commits, notifying the pager of each one."""
+        try:
+            for commit in commits:
+                with self._changed:
+                    self._found.append(commit)
+                    self._changed.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            with self._changed:
+                self._done = True
+                self._changed.notify_all()
+
+    def _wait_for(self, count: int) -> int:
+        """Wait until at least 'count' commits have been found, or there
+        are no more to find, and return how many have been found."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self._done or len(self._found) >= count
+            )
+        if self._error:
+            raise self._error
+        return len(self._found)
+
+    def wait(self) -> List[Commit]:
+        """Wait until all the commits have been found, and return them."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._done)
+        if self._error:
+            raise self._error
+        return self._found
+
+    def render(self, start: int) -> str:
+        """Return the page of commits beginning at the given index, waiting
+        for them to be found if necessary."""
+        end = min(self._wait_for(start + self.page_size), start + self.page_size)
+        page = self._found[start:end]
+        if self._load_messages:
+            self._load_messages(page)
+
+        # Until all the commits are found, the total is only a lower bound.
+        total = f"{len(self._found)}" if self._done else f"{len(self._found)}+"
+        lines = [f' {start + 1}-{end} of {total} '.center(50, '=')]
+        for num, commit in enumerate(page, start=start + 1):
+            lines.append(f'[{num}]')
+            lines.append(str(commit))
+        return '\n'.join(lines)
+
+    def search(self, text: str, start: int) -> Optional[int]:
+        """Return the index of the first commit at or after 'start' whose
+        SHA, author, or message contains the text (ignoring case), or None
+        if there is no such commit."""
+        found = self.wait()
+        if self._load_messages:
+            self._load_messages(found[start:])
+
+        text = text.casefold()
+        for index in range(start, len(found)):
+            commit = found[index]
+            if any(
+                text in field.casefold()
+                for field in (commit.sha, commit.author, commit.message)
+            ):
+                return index
+        return None
+
+    def run(self) -> bool:
+        """Page through the commits interactively. Returns False if the user
+        quit before reaching the last page."""
+        position = 0
+        while True:
+            if position >= self._wait_for(position + 1):
+                return True
+
+            click.echo(self.render(position))
+            # Don't prompt after the last page.
+            if self._done and position + self.page_size >= len(self._found):
+                return True
+
+            command = click.prompt(
+                self.PROMPT, default='', show_default=False
+            ).strip()
+
+            if command in ('', 'n'):
+                position += self.page_size
+            elif command == 'p':
+                position = max(0, position - self.page_size)
+            elif command == 'q':
+                return False
+            elif command.isdigit() and int(command) > 0:
+                num = int(command)
+                if num > self._wait_for(num):
+                    click.echo(f"There are only {len(self._found)} commits.")
+                else:
+                    position = num - 1
+            elif command.startswith('/') and len(command) > 1:
+                index = self.search(command[1:], position + 1)
+                if index is None:
+                    click.echo(f"No more commits matching '{command[1:]}'.")
+                else:
+                    position = index
+            else:
+                click.echo(self.PROMPT)
@@ -1,14 +1,25 @@
 import git
+import threading
 from git.repo import Repo
+from typing import Dict, List
 
-from branch_detective.commits import CommitLog
+from branch_detective.commits import Commit, CommitLog, Normalization
 
 
 class RepositoryLens:
     """Provides an interface to the repository in the current working
     directory."""
 
-    def __init__(self, source_branch: str = '', dest_branch: str = ''):
+    # The format of a header-only 'git log', which Commit knows how to parse.
+    HEADER_LOG_FORMAT: str = (
+        'commit %H%nParents: %P%nAuthor: %an <%ae>%nDate:   %ad%n'
+    )
+
+    def __init__(
+        self, source_branch: str = '', dest_branch: str = '',
+        normalization: Normalization = Normalization(),
+        lazy: bool = False
+    ):
         """Initializes a new RepositoryLens that works with the Git
         repository in the current working directory, and which specifically
         verifies and examines the source and destination branches specified
@@ -16,6 +27,8 @@ class RepositoryLens:
 
         source_branch: the name of the branch from which commits are examined
         dest_branch: the name of the branch to check for missing commits
+        normalization: how commit messages are normalized for comparison
+        lazy: whether to only load commit messages when they're needed
         """
         # Ensure the current working directory is a valid Git repository, and
         # create a connection to it.
@@ -50,16 +63,22 @@ class RepositoryLens:
         if self.repo.is_dirty():
             raise RuntimeError("There are uncommitted changes. Aborting.")
 
-        self._source_log: CommitLog = CommitLog()
-        self._dest_log: CommitLog = CommitLog()
+        self.normalization: Normalization = normalization
+        self.lazy: bool = lazy
+        # Messages may be loaded while commits are compared in the background.
+        self._load_lock = threading.Lock()
+        self._source_log: CommitLog = CommitLog(normalization=normalization)
+        self._dest_log: CommitLog = CommitLog(normalization=normalization)
 
     @property
     def raw_source_log(self) -> str:
         """Retrieve the raw (text) output of 'git log' for the source branch.
         """
+        if self.lazy:
+            return self.raw_header_log(self.source_branch)
         active_branch = self.repo.active_branch.name
         self.repo.heads[self.source_branch].checkout()
-        raw_log = self.repo.git.log()
+        raw_log = self.repo.git.log(parents=True)
         self.repo.heads[active_branch].checkout()
         return raw_log
 
@@ -67,19 +86,74 @@ class RepositoryLens:
     def raw_dest_log(self) -> str:
         """Retrieve the raw (text) output of 'git log' for the dest branch.
         """
+        if self.lazy:
+            return self.raw_header_log(self.dest_branch)
         active_branch = self.repo.active_branch.name
         self.repo.heads[self.dest_branch].checkout()
-        raw_log = self.repo.git.log()
+        raw_log = self.repo.git.log(parents=True)
         self.repo.heads[active_branch].checkout()
         return raw_log
 
+    def raw_header_log(self, branch: str) -> str:
+        """Retrieve the raw (text) output of 'git log' for the given branch,
+        with only the commit headers, and not the messages. Commits which were
+        cherry picked have a 'CherryPick:' field added instead.
+        """
+        cherry_picks = self.cherry_picks(branch)
+        raw_log = self.repo.git.log(branch, format=self.HEADER_LOG_FORMAT)
+
+        lines = []
+        for line in raw_log.split('\n'):
+            lines.append(line)
+            if line.startswith('commit '):
+                cherry_pick = cherry_picks.get(line.split()[1])
+                if cherry_pick:
+                    lines.append(f"CherryPick: {cherry_pick}")
+        return '\n'.join(lines) + '\n'
+
+    def cherry_picks(self, branch: str) -> Dict[str, str]:
+        """Find the commits on the given branch with a "cherry pick" footer,
+        returning the SHA each was cherry picked from, by commit SHA. Only
+        the messages of those commits are retrieved from Git.
+        """
+        raw_log = self.repo.git.log(
+            branch, fixed_strings=True, grep='(cherry picked from commit ',
+            format='%x00%H%n%B'
+        )
+
+        cherry_picks = {}
+        for raw_commit in raw_log.split('\x00')[1:]:
+            sha, _, message = raw_commit.partition('\n')
+            cherry_pick = Commit.parse_cherry_pick(message)
+            if cherry_pick:
+                cherry_picks[sha] = cherry_pick
+        return cherry_picks
+
+    def load_messages(self, shas: List[str]) -> Dict[str, str]:
+        """Retrieve the raw messages of the given commits, by SHA. GitPython
+        reads the objects through a single, persistent 'git cat-file --batch'
+        process, instead of starting one process per commit.
+        """
+        messages = {}
+        with self._load_lock:
+            for sha in shas:
+                _, _, _, data = self.repo.git.get_object_data(sha)
+                # A commit object is its headers, a blank line, then the
+                # message.
+                _, _, message = data.partition(b'\n\n')
+                messages[sha] = message.decode('utf-8', errors='replace')
+        return messages
+
     @property
     def source_log(self) -> CommitLog:
         """Return, and construct if necessary, the CommitLog generated from the
         raw (text) output of 'git log' for the source branch. This will not
         attempt to reparse the log after an initial call."""
         if not self._source_log:
-            self._source_log = CommitLog(self.raw_source_log)
+            self._source_log = CommitLog(
+                self.raw_source_log, self.normalization,
+                self.load_messages if self.lazy else None
+            )
         return self._source_log
 
     @property
@@ -88,5 +162,8 @@ class RepositoryLens:
         raw (text) output of 'git log' for the dest branch. This will not
         attempt to reparse the log after an initial call."""
         if not self._dest_log:
-            self._dest_log = CommitLog(self.raw_dest_log)
+            self._dest_log = CommitLog(
+                self.raw_dest_log, self.normalization,
+                self.load_messages if self.lazy else None
+            )
         return self._dest_log
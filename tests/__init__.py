@@ -59,6 +59,47 @@ Date:   Tue Feb 1 14:28:19 2022 -0500
 %%%%amazing feature does amazing things amazingly
 %%%%it's so amazing
 %%%%such wow
+""".replace('%', ' '),
+
+    "flerm_signed": """commit f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6f6
+Author: Jane Plain <jane@example.com>
+Date:   Fri Mar 18 10:12:44 2022 -0700
+
+%%%%Bug: fix  flerminator
+%%%%
+%%%%flerminator was flermming incorrectly
+%%%%now it flerms flermily
+%%%%
+%%%%Signed-off-by: Jane Plain <jane@example.com>
+""".replace('%', ' '),
+
+    "gerrit": """commit 1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a
+Author: Bob Smith <bob@example.com>
+Date:   Mon Apr 4 10:00:00 2022 -0500
+
+%%%%feat: gerrit review
+%%%%
+%%%%Change-Id: I0123456789abcdef
+%%%%Reviewed-on: https://review.example.com/c/1234
+""".replace('%', ' '),
+
+    "gerrit_backport": """commit 2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b
+Author: Bob Smith <bob@example.com>
+Date:   Tue Apr 5 10:00:00 2022 -0500
+
+%%%%feat: gerrit review (backport to 1.x)
+%%%%
+%%%%Change-Id: I0123456789abcdef
+""".replace('%', ' '),
+
+    "amazing_backport": """commit 3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c
+Author: Bob Smith <bob@example.com>
+Date:   Wed Apr 6 10:00:00 2022 -0500
+
+%%%%feat: amazing feature, adapted for 1.x
+%%%%
+%%%%(backported from commit a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1)
+%%%%Signed-off-by: Bob Smith <bob@example.com>
 """.replace('%', ' ')
 }
 
@@ -77,3 +118,48 @@ mock_dest_2 = '\n\n'.join([
     mock_commits['flerm'],
     mock_commits['amazing_b'],
 ])
+
+mock_dest_3 = '\n\n'.join([
+    mock_commits['flerm_signed'],
+    mock_commits['amazing_b'],
+])
+
+# The same commits as mock_dest, as a header-only 'git log', with messages
+# loaded separately.
+mock_dest_headers = """commit d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4
+CherryPick: b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2
+Parents: 0z0z0z0
+Author: Jane Plain <jane@example.com>
+Date:   Thu Mar 17 09:08:07 2022 -0700
+
+commit e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5
+Parents: 0z0z0z0
+Author: Bob Smith <bob@example.com>
+Date:   Tue Feb 1 14:28:19 2022 -0500
+"""
+
+mock_messages = {
+    'd4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4': (
+        "bug: fix flerminator\n\n"
+        "flerminator was flermming incorrectly\n"
+        "now it flerms flermily\n\n"
+        "(cherry picked from commit b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2)\n"
+    ),
+    'e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5': (
+        "feat: amazing feature\n\n"
+        "amazing feature does amazing things amazingly\n"
+        "it's so amazing\n"
+        "such wow\n"
+    ),
+}
+
+mock_source_trailers = '\n\n'.join([
+    mock_commits['amazing'],
+    mock_commits['flerm'],
+    mock_commits['gerrit'],
+])
+
+mock_dest_trailers = '\n\n'.join([
+    mock_commits['gerrit_backport'],
+    mock_commits['amazing_backport'],
+])
@@ -2,8 +2,10 @@ import pytest
 
 from datetime import datetime, timedelta, timezone
 
-from branch_detective.commits import Commit, CommitLog
-from . import mock_commits, mock_source, mock_dest
+from branch_detective.commits import Commit, CommitLog, Normalization
+from . import (
+    mock_commits, mock_source, mock_dest, mock_dest_headers, mock_messages
+)
 
 
 @pytest.mark.parametrize(
@@ -191,6 +193,103 @@ def test_commit_message(mock_commit, expected):
         assert line == expected_line
 
 
+@pytest.mark.parametrize(
+    "mock_a, mock_b, expected",
+    (
+        (mock_commits['flerm'], mock_commits['flerm_cherry'], True),
+        (mock_commits['amazing'], mock_commits['amazing_b'], True),
+        (mock_commits['amazing'], mock_commits['flerm'], False),
+        (mock_commits['flerm'], mock_commits['flerm_signed'], False),
+    )
+)
+def test_commit_fingerprint(mock_a, mock_b, expected):
+    commit_a = Commit(mock_a)
+    commit_b = Commit(mock_b)
+    assert len(commit_a.fingerprint) == Commit.FINGERPRINT_SIZE
+    assert (commit_a.fingerprint == commit_b.fingerprint) == expected
+
+
+@pytest.mark.parametrize(
+    "normalization, expected",
+    (
+        (Normalization(), False),
+        (Normalization(collapse_whitespace=True), False),
+        (Normalization(collapse_whitespace=True, strip_trailers=True), False),
+        (Normalization(True, True, True), True),
+    )
+)
+def test_commit_fingerprint_normalized(normalization, expected):
+    commit_a = Commit(mock_commits['flerm'], normalization)
+    commit_b = Commit(mock_commits['flerm_signed'], normalization)
+    assert (commit_a.fingerprint == commit_b.fingerprint) == expected
+
+
+def test_commit_normalized_message_cached(monkeypatch):
+    normalization = Normalization(True, True, True)
+    log = CommitLog(mock_commits['flerm_signed'], normalization)
+    commit = Commit(mock_commits['flerm'], normalization)
+    assert commit.normalized_message == Commit.normalize_message(
+        commit.message, normalization
+    )
+
+    # Lookups compare the cached normalized messages, without renormalizing.
+    def fail(*args, **kwargs):
+        raise AssertionError("message was normalized again")
+    monkeypatch.setattr(Commit, 'normalize_message', fail)
+    assert log.find_commit_by_message(commit) is not None
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    (
+        (
+            "fix: thing\n\nSigned-off-by: Jane Plain <jane@example.com>",
+            "fix: thing"
+        ),
+        (
+            "fix: thing\n\nthe body\nReviewed-by: Bob Smith",
+            "fix: thing\n\nthe body\nReviewed-by: Bob Smith"
+        ),
+        (
+            "Signed-off-by: Jane Plain <jane@example.com>",
+            "Signed-off-by: Jane Plain <jane@example.com>"
+        ),
+    )
+)
+def test_commit_strip_trailers(message, expected):
+    normalization = Normalization(strip_trailers=True)
+    assert Commit.normalize_message(message, normalization) == expected
+
+
+@pytest.mark.parametrize(
+    "mock_commit, expected",
+    (
+        (mock_commits['amazing'], {}),
+        (
+            mock_commits['flerm_signed'],
+            {'signed-off-by': ['Jane Plain <jane@example.com>']}
+        ),
+        (
+            mock_commits['gerrit'],
+            {
+                'change-id': ['I0123456789abcdef'],
+                'reviewed-on': ['https://review.example.com/c/1234'],
+            }
+        ),
+        (
+            mock_commits['amazing_backport'],
+            {
+                'backported-from': ['a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1'],
+                'signed-off-by': ['Bob Smith <bob@example.com>'],
+            }
+        ),
+    )
+)
+def test_commit_trailers(mock_commit, expected):
+    commit = Commit(mock_commit)
+    assert commit.trailers == expected
+
+
 @pytest.mark.parametrize(
     "raw, expected_shas",
     (
@@ -215,3 +314,185 @@ def test_commitlog(raw, expected_shas):
     log = CommitLog(raw)
     for commit, expect in zip(log, expected_shas):
         assert commit.sha == expect
+
+
+@pytest.mark.parametrize(
+    "key, value, expected",
+    (
+        ('change-id', 'I0123456789abcdef', '2b2b2b2b'),
+        ('Change-Id', 'I0123456789abcdef', '2b2b2b2b'),
+        ('backported-from', 'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', '3c3c3c3c'),
+        ('change-id', 'Ifedcba9876543210', None),
+    )
+)
+def test_commitlog_find_by_trailer(key, value, expected):
+    log = CommitLog('\n\n'.join([
+        mock_commits['gerrit_backport'],
+        mock_commits['amazing_backport'],
+    ]))
+    commit = log.find_commit_by_trailer(key, value)
+    if expected is None:
+        assert commit is None
+    else:
+        assert commit.sha.startswith(expected)
+
+
+@pytest.mark.parametrize(
+    "key, sha, expected",
+    (
+        ('backported-from', 'a1b2c3d4e5f60718293a4b5c6d7e8f9012345678', '3c3c3c3c'),
+        ('Backported-From', 'A1B2C3D4E5F60718293A4B5C6D7E8F9012345678', '3c3c3c3c'),
+        ('backported-from', 'a1b2c4d4e5f60718293a4b5c6d7e8f9012345678', None),
+        ('backported-from', 'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', None),
+        # Only footers are matched by abbreviated SHA.
+        ('bug', '1234abcdabcdabcdabcdabcdabcdabcdabcdabcd', None),
+    )
+)
+def test_commitlog_find_by_trailer_sha(key, sha, expected):
+    log = CommitLog('\n\n'.join([
+        mock_commits['gerrit_backport'] + "    Bug: 1234\n",
+        mock_commits['amazing_backport'].replace(
+            'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', 'a1b2c3'
+        ),
+    ]))
+    commit = log.find_commit_by_trailer_sha(key, sha)
+    if expected is None:
+        assert commit is None
+    else:
+        assert commit.sha.startswith(expected)
+
+
+@pytest.mark.parametrize(
+    "sha, expected",
+    (
+        ('b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2', 'b2b2b2b2'),
+        ('b2b2b2b', 'b2b2b2b2'),
+        ('C3C3', 'c3c3c3c3'),
+        ('c3c', None),
+        ('d4d4d4d', None),
+    )
+)
+def test_commitlog_find_by_abbrev_sha(sha, expected):
+    log = CommitLog(mock_source)
+    commit = log.find_commit_by_abbrev_sha(sha)
+    if expected is None:
+        assert commit is None
+    else:
+        assert commit.sha.startswith(expected)
+
+    # Commits appended after the index is built are found too.
+    log.append(Commit(mock_commits['flerm_cherry']))
+    assert log.find_commit_by_abbrev_sha('d4d4d4d') is not None
+
+
+def test_commitlog_includes_by_message():
+    log = CommitLog(mock_dest)
+    assert log.includes_commit_by_message(Commit(mock_commits['flerm']).message)
+    assert not log.includes_commit_by_message(
+        Commit(mock_commits['plootash']).message
+    )
+
+
+class MockLoader:
+    """Loads commit messages from mock_messages, recording each batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, shas):
+        self.batches.append(shas)
+        return {sha: mock_messages[sha] for sha in shas}
+
+
+def test_commitlog_lazy_headers():
+    loader = MockLoader()
+    log = CommitLog(mock_dest_headers, loader=loader)
+
+    assert [commit.sha for commit in log] == [
+        'e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5',
+        'd4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4',
+    ]
+    assert [commit.is_merge for commit in log] == [False, False]
+    assert log.includes_commit_by_sha(
+        'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2'
+    )
+    assert not any(commit.is_loaded for commit in log)
+    assert loader.batches == []
+
+
+def test_commitlog_lazy_messages():
+    loader = MockLoader()
+    log = CommitLog(mock_dest_headers, loader=loader)
+    eager = CommitLog(mock_dest)
+
+    # A lookup by message loads every message in one batch.
+    assert log.includes_commit_by_message(
+        Commit(mock_commits['flerm']).message
+    )
+    assert len(loader.batches) == 1
+    for lazy_commit, eager_commit in zip(log, eager):
+        assert lazy_commit.message == eager_commit.message
+        assert lazy_commit.fingerprint == eager_commit.fingerprint
+
+
+def test_commit_lazy_message():
+    loader = MockLoader()
+    log = CommitLog(mock_dest_headers, loader=loader)
+    commit = log.find_commit_by_sha('e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5')
+
+    assert commit.message.startswith('feat: amazing feature')
+    assert loader.batches == [['e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5']]
+
+
+def test_commit_lazy_parents():
+    commit = Commit(
+        "commit c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3\n"
+        "Parents: 0z0z0z0 1y1y1y1\n"
+        "Author: Jane Plain <jane@example.com>\n"
+        "Date:   Fri Mar 14 11:15:27 2022 -0700\n",
+        loader=lambda shas: {sha: "Merge feature/plootash" for sha in shas}
+    )
+    assert commit.is_merge
+    assert commit.merge == '0z0z0z0 1y1y1y1'
+    assert not commit.is_loaded
+
+
+def test_commit_lazy_message_indentation():
+    raw_message = "feat: indent\n\n  indented body line\nplain line\n"
+    header = (
+        "commit a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1\n"
+        "Author: Bob Smith <bob@example.com>\n"
+        "Date:   Tue Feb 1 14:22:33 2022 -0500\n"
+    )
+    eager = Commit(header + "\n" + "".join(
+        f"    {line}\n" for line in raw_message.split("\n")[:-1]
+    ))
+    lazy = Commit(header, loader=lambda shas: {shas[0]: raw_message})
+
+    assert lazy.message == eager.message
+    assert lazy.message == "feat: indent\n\nindented body line\nplain line"
+    assert lazy.fingerprint == eager.fingerprint
+
+
+def test_commitlog_fingerprint_of():
+    commit = Commit(mock_commits['flerm'])
+    log = CommitLog(normalization=Normalization(casefold=True))
+
+    assert log.fingerprint_of(commit) == Commit.fingerprint_message(
+        commit.message, Normalization(casefold=True)
+    )
+    assert CommitLog().fingerprint_of(commit) == commit.fingerprint
+
+
+def test_commit_parents():
+    # As output by 'git log --parents'.
+    commit = Commit(mock_commits['amazing'].replace(
+        'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+        'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1 0z0z0z0 1y1y1y1', 1
+    ))
+    assert commit.sha == 'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1'
+    assert commit.parents == ['0z0z0z0', '1y1y1y1']
+
+    assert Commit(mock_commits['amazing']).parents == []
+    log = CommitLog(mock_dest_headers, loader=MockLoader())
+    assert [commit.parents for commit in log] == [['0z0z0z0'], ['0z0z0z0']]
@@ -1,9 +1,12 @@
 import pytest
 
 from branch_detective import compare
-from branch_detective.commits import CommitLog
+from branch_detective.commits import CommitLog, Normalization
 
-from . import mock_source, mock_dest, mock_dest_2
+from . import (
+    mock_commits, mock_source, mock_dest, mock_dest_2, mock_dest_3,
+    mock_source_trailers, mock_dest_trailers
+)
 
 
 def test_missing_by_message():
@@ -18,6 +21,30 @@ def test_missing_by_message():
         assert commit.sha == expected
 
 
+@pytest.mark.parametrize(
+    "normalization, expected_missing",
+    (
+        (
+            Normalization(), [
+                'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+                'c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3',
+            ],
+        ),
+        (
+            Normalization(True, True, True), [
+                'c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3',
+            ],
+        ),
+    )
+)
+def test_missing_by_message_normalized(normalization, expected_missing):
+    source = CommitLog(mock_source, normalization)
+    dest = CommitLog(mock_dest_3, normalization)
+    missing = compare.find_missing_by_message(source, dest)
+
+    assert [commit.sha for commit in missing] == expected_missing
+
+
 @pytest.mark.parametrize(
     "simulate, expected_missing",
     (
@@ -41,3 +68,177 @@ def test_missing_by_sha(simulate, expected_missing):
 
     for commit, expected in zip(missing, expected_missing):
         assert commit.sha == expected
+
+
+@pytest.mark.parametrize(
+    "by_message, expected_source_only, expected_dest_only, expected_matched",
+    (
+        (
+            True,
+            ['c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3'],
+            [],
+            [
+                (
+                    'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+                    'e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5',
+                    compare.MATCH_MESSAGE
+                ),
+                (
+                    'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+                    'd4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4',
+                    compare.MATCH_CHERRY_PICK
+                ),
+            ],
+        ),
+        (
+            False,
+            [
+                'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+                'c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3',
+            ],
+            ['e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5e5'],
+            [
+                (
+                    'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+                    'd4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4',
+                    compare.MATCH_CHERRY_PICK
+                ),
+            ],
+        ),
+    )
+)
+def test_compare_both(
+    by_message, expected_source_only, expected_dest_only, expected_matched
+):
+    source = CommitLog(mock_source)
+    dest = CommitLog(mock_dest)
+    comparison = compare.compare_both(source, dest, by_message=by_message)
+
+    assert [c.sha for c in comparison.source_only] == expected_source_only
+    assert [c.sha for c in comparison.dest_only] == expected_dest_only
+    assert [
+        (match.source.sha, match.dest.sha, match.how)
+        for match in comparison.matched
+    ] == expected_matched
+
+
+def test_compare_both_same_as_swapped():
+    source = CommitLog(mock_source)
+    dest = CommitLog(mock_dest_2)
+    comparison = compare.compare_both(source, dest, by_message=False)
+
+    forward = compare.find_missing_by_sha(source, dest)
+    backward = compare.find_missing_by_sha(dest, source)
+    assert [c.sha for c in comparison.source_only] == [c.sha for c in forward]
+    assert [c.sha for c in comparison.dest_only] == [c.sha for c in backward]
+
+
+@pytest.mark.parametrize("by_message", (True, False))
+def test_compare_both_source_cherry_pick(by_message):
+    # The cherry pick footer is on the source commit, so it's only matched
+    # when comparing from the dest side, but mustn't be reported as missing.
+    source = CommitLog(mock_commits['flerm_cherry'])
+    dest = CommitLog(mock_commits['flerm'])
+    comparison = compare.compare_both(source, dest, by_message=by_message)
+
+    assert [c.sha for c in comparison.source_only] == []
+    assert [c.sha for c in comparison.dest_only] == []
+    assert [
+        (match.source.sha[:4], match.dest.sha[:4])
+        for match in comparison.matched
+    ] == [('d4d4', 'b2b2')]
+
+
+@pytest.mark.parametrize(
+    "trailer_keys, expected_missing",
+    (
+        (
+            (), [
+                'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+                'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+                '1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a',
+            ],
+        ),
+        (
+            ('Change-Id',), [
+                'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+                'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+            ],
+        ),
+        (
+            ('change-id', 'backported-from'), [
+                'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+            ],
+        ),
+    )
+)
+@pytest.mark.parametrize(
+    "find", (compare.find_missing_by_message, compare.find_missing_by_sha)
+)
+def test_missing_by_trailer(find, trailer_keys, expected_missing):
+    source = CommitLog(mock_source_trailers)
+    dest = CommitLog(mock_dest_trailers)
+    missing = find(source, dest, trailer_keys=trailer_keys)
+
+    assert [commit.sha for commit in missing] == expected_missing
+
+
+def test_missing_by_trailer_abbreviated():
+    source = CommitLog(mock_source_trailers)
+    dest = CommitLog(mock_dest_trailers.replace(
+        'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', 'a1a1a1a'
+    ))
+    missing = compare.find_missing_by_sha(
+        source, dest, trailer_keys=('backported-from',)
+    )
+
+    assert 'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1' not in [
+        commit.sha for commit in missing
+    ]
+
+
+@pytest.mark.parametrize(
+    "footer_sha",
+    ('a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', 'a1a1a1a', 'A1A1A1A')
+)
+def test_missing_by_trailer_source_footer(footer_sha):
+    # The backport is on the source side, so its footer refers to a dest
+    # commit's SHA.
+    source = CommitLog(mock_commits['amazing_backport'].replace(
+        'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1', footer_sha
+    ))
+    dest = CommitLog(mock_commits['amazing'])
+    missing = compare.find_missing_by_sha(
+        source, dest, trailer_keys=('backported-from',)
+    )
+    assert [commit.sha for commit in missing] == []
+
+    comparison = compare.compare_both(
+        source, dest, by_message=False, trailer_keys=('backported-from',)
+    )
+    assert [c.sha for c in comparison.source_only] == []
+    assert [c.sha for c in comparison.dest_only] == []
+    assert [
+        (match.source.sha[:4], match.dest.sha[:4], match.how)
+        for match in comparison.matched
+    ] == [('3c3c', 'a1a1', 'backported-from')]
+
+
+def test_compare_both_by_trailer():
+    source = CommitLog(mock_source_trailers)
+    dest = CommitLog(mock_dest_trailers)
+    comparison = compare.compare_both(
+        source, dest, trailer_keys=('change-id', 'backported-from')
+    )
+
+    assert [c.sha for c in comparison.source_only] == [
+        'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+    ]
+    assert [c.sha for c in comparison.dest_only] == []
+    assert [
+        (match.source.sha[:8], match.dest.sha[:8], match.how)
+        for match in comparison.matched
+    ] == [
+        ('a1a1a1a1', '3c3c3c3c', 'backported-from'),
+        ('1a1a1a1a', '2b2b2b2b', 'change-id'),
+    ]
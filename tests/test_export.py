@@ -0,0 +1,120 @@
+import pytest
+
+from branch_detective.commits import Commit, CommitLog, Normalization
+from branch_detective.export import ColumnarLog, export_commit_log
+
+from . import mock_source, mock_dest, mock_dest_headers, mock_messages
+
+
+def test_export_roundtrip(tmp_path):
+    path = str(tmp_path / 'source.bdlog')
+    log = CommitLog(mock_source)
+    export_commit_log(
+        log, path, matched=['b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2']
+    )
+
+    with ColumnarLog(path) as exported:
+        assert len(exported) == len(log)
+        for index, commit in enumerate(log):
+            assert exported.sha(index) == commit.sha
+            assert exported.date(index) == commit.date
+            assert exported.author(index) == commit.author
+            assert exported.merge(index) == commit.merge
+            assert exported.cherry_pick(index) == commit.cherry_pick
+            assert exported.fingerprint(index) == commit.fingerprint
+            assert exported.is_merge(index) == commit.is_merge
+            assert exported.parents(index) == commit.parents
+        assert [exported.is_matched(i) for i in range(len(exported))] == [
+            False, True, False
+        ]
+
+
+def test_export_compared(tmp_path):
+    path = str(tmp_path / 'compared.bdlog')
+    log = CommitLog(mock_source)
+    export_commit_log(
+        log, path,
+        matched=['b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2'],
+        compared=[
+            'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1',
+            'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2',
+        ]
+    )
+
+    # The last commit was filtered out, so it's neither matched nor missing.
+    with ColumnarLog(path) as exported:
+        assert [exported.is_compared(i) for i in range(len(exported))] == [
+            True, True, False
+        ]
+        assert [exported.is_matched(i) for i in range(len(exported))] == [
+            False, True, False
+        ]
+
+
+def test_export_cherry_pick(tmp_path):
+    path = str(tmp_path / 'dest.bdlog')
+    export_commit_log(CommitLog(mock_dest), path)
+
+    with ColumnarLog(path) as exported:
+        index = exported.find_sha('d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4d4')
+        assert exported.cherry_pick(index) == (
+            'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2'
+        )
+        assert exported.find_sha('f' * 40) is None
+
+
+def test_export_lazy(tmp_path):
+    path = str(tmp_path / 'lazy.bdlog')
+    log = CommitLog(
+        mock_dest_headers, Normalization(casefold=True),
+        loader=lambda shas: {sha: mock_messages[sha] for sha in shas}
+    )
+    export_commit_log(log, path)
+
+    # Exporting doesn't load messages, so no fingerprints are exported.
+    assert not any(commit.is_loaded for commit in log)
+    with ColumnarLog(path) as exported:
+        assert exported.normalization == Normalization(casefold=True)
+        assert exported.fingerprint(0) is None
+        assert list(exported.flags) == [ColumnarLog.FLAG_COMPARED] * 2
+        assert exported.parents(0) == ['0z0z0z0']
+
+
+def test_export_log_normalization(tmp_path):
+    path = str(tmp_path / 'casefold.bdlog')
+    source = CommitLog(mock_source)
+    log = CommitLog(normalization=Normalization(casefold=True))
+    for commit in source:
+        log.append(commit)
+    export_commit_log(log, path)
+
+    # Commits parsed with another normalization are fingerprinted under the
+    # one recorded in the file.
+    with ColumnarLog(path) as exported:
+        assert exported.normalization == Normalization(casefold=True)
+        for index, commit in enumerate(source):
+            assert exported.fingerprint(index) == Commit.fingerprint_message(
+                commit.message, Normalization(casefold=True)
+            )
+        assert any(
+            exported.fingerprint(index) != commit.fingerprint
+            for index, commit in enumerate(source)
+        )
+
+
+def test_export_invalid(tmp_path):
+    path = tmp_path / 'invalid.bdlog'
+    path.write_bytes(b'not an exported log at all')
+    with pytest.raises(RuntimeError):
+        ColumnarLog(str(path))
+
+
+@pytest.mark.parametrize("size", (0, 40, 100, -8, -1))
+def test_export_truncated(tmp_path, size):
+    path = tmp_path / 'truncated.bdlog'
+    export_commit_log(CommitLog(mock_source), str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:size])
+
+    with pytest.raises(RuntimeError):
+        ColumnarLog(str(path))
@@ -0,0 +1,89 @@
+import click
+import pytest
+
+from branch_detective.commits import CommitLog
+from branch_detective.pager import Pager, echo_all
+
+from . import mock_source
+
+
+def scripted(monkeypatch, commands):
+    """Answer the pager's prompts with the given commands, in order."""
+    commands = iter(commands)
+    monkeypatch.setattr(click, 'prompt', lambda *args, **kwargs: next(commands))
+
+
+def test_pager_render():
+    pager = Pager(CommitLog(mock_source), page_size=2)
+    page = pager.render(0)
+
+    assert page.startswith(' 1-2 of 3 '.center(50, '='))
+    assert 'a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1a1' in page
+    assert 'b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2b2' in page
+    assert 'c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3c3' not in page
+
+
+@pytest.mark.parametrize(
+    "text, start, expected",
+    (
+        ('FLERMINATOR', 0, 1),
+        ('plootash', 0, 2),
+        ('amazing', 1, None),
+        ('a1a1a1', 0, 0),
+    )
+)
+def test_pager_search(text, start, expected):
+    pager = Pager(CommitLog(mock_source))
+    assert pager.search(text, start) == expected
+
+
+@pytest.mark.parametrize(
+    "commands, expected_pages, expected_finished",
+    (
+        ([''], [' 1-1 of 3 ', ' 2-2 of 3 ', ' 3-3 of 3 '], True),
+        (['', 'p', 'q'], [' 1-1 of 3 ', ' 2-2 of 3 ', ' 1-1 of 3 '], False),
+        (['3'], [' 1-1 of 3 ', ' 3-3 of 3 '], True),
+        (['/plootash'], [' 1-1 of 3 ', ' 3-3 of 3 '], True),
+        (['9', 'q'], [' 1-1 of 3 ', ' 1-1 of 3 '], False),
+    )
+)
+def test_pager_run(
+    monkeypatch, capsys, commands, expected_pages, expected_finished
+):
+    # Pressing enter on the second-to-last page moves to the last page.
+    scripted(monkeypatch, commands + [''])
+    pager = Pager(CommitLog(mock_source), page_size=1)
+
+    assert pager.run() == expected_finished
+    output = capsys.readouterr().out
+    assert [
+        line for line in output.split('\n') if line.startswith('=')
+    ] == [page.center(50, '=') for page in expected_pages]
+
+
+def test_pager_run_empty(monkeypatch, capsys):
+    # There are no pages to show, so the user is never prompted.
+    scripted(monkeypatch, [])
+    pager = Pager(iter(()))
+
+    assert pager.run()
+    assert capsys.readouterr().out == ''
+    assert pager.wait() == []
+
+
+def test_pager_background_error():
+    def commits():
+        yield from CommitLog(mock_source)
+        raise RuntimeError("Comparison failed.")
+
+    pager = Pager(commits())
+    with pytest.raises(RuntimeError):
+        pager.wait()
+
+
+def test_echo_all(capsys):
+    echo_all(CommitLog(mock_source), batch_size=2)
+    output = capsys.readouterr().out
+
+    for num in range(1, 4):
+        assert f' {num} of 3 '.center(50, '=') in output
@@ -0,0 +1,267 @@
+"""Stress and scaling harness for comparing large commit logs.
+
+This is skipped unless BRANCH_DETECTIVE_SCALING is set, as it generates and
+compares logs of up to a million commits. For example:
+
+    BRANCH_DETECTIVE_SCALING=10000,100000,1000000 pytest tests/test_scaling.py -s
+
+The logs are generated ahead of time, and each size is then measured in a
+fresh process, so that the peak RSS it reports is only that of parsing and
+comparing. The harness fails if any size exceeds its budget in
+scaling_budget.json, or if the time taken grows super-linearly with the
+number of commits. That is only checked if the largest size is at least
+MIN_SPAN times the smallest, as the fit is too noisy over narrower ranges.
+"""
+import functools
+import gc
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import timeit
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+import pytest
+
+from branch_detective import compare
+from branch_detective.commits import Commit, CommitLog
+
+SIZES = [
+    int(size)
+    for size in os.environ.get('BRANCH_DETECTIVE_SCALING', '').split(',')
+    if size.strip()
+]
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), 'scaling_budget.json')
+MODES = {
+    'message': compare.find_missing_by_message,
+    'message-ignore-merge': functools.partial(
+        compare.find_missing_by_message, ignore_merge=True
+    ),
+    'sha': compare.find_missing_by_sha,
+}
+# How many times larger the largest size must be than the smallest, for the
+# growth exponent to be checked.
+MIN_SPAN = 100
+# How many times each comparison is timed, keeping the fastest. Each time,
+# the comparison is repeated for at least 0.2s, so small sizes aren't lost
+# in the timer's noise.
+REPEATS = 5
+
+
+def generate_logs(
+    size: int,
+    collision_rate: float = 0.05,
+    cherry_pick_rate: float = 0.1,
+    merge_rate: float = 0.1,
+    seed: int = 0
+) -> Tuple[str, str]:
+    """Generate the raw 'git log' of a source branch, and of a dest branch
+    with 'size' commits. The source branch has a tenth as many commits, half
+    of which are shared with the dest branch.
+
+    collision_rate: the share of dest commits reusing an earlier message
+    cherry_pick_rate: the share of dest commits cherry picked from source
+    merge_rate: the share of commits which are merges
+    seed: the seed for the random number generator
+    """
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone(timedelta(hours=-5)))
+
+    def raw_commit(index: int, sha: str, message: str) -> str:
+        lines = [f"commit {sha}"]
+        if rng.random() < merge_rate:
+            lines.append(f"Merge: {sha[:7]} {sha[-7:]}")
+        lines.append(f"Author: Dev {index % 97} <dev{index % 97}@example.com>")
+        date = start + timedelta(seconds=index)
+        lines.append(f"Date:   {date.strftime(Commit.DATETIME_FORMAT_STR)}")
+        lines.append("")
+        lines.extend(f"    {line}" for line in message.split('\n'))
+        return '\n'.join(lines) + '\n'
+
+    source_size = max(2, size // 10)
+    source_shas = [f'{rng.getrandbits(160):040x}' for _ in range(source_size)]
+    source_messages = [
+        f"feat: source change {index}\n\nsource body {index}"
+        for index in range(source_size)
+    ]
+    source = [
+        raw_commit(index, sha, message)
+        for index, (sha, message) in enumerate(zip(source_shas, source_messages))
+    ]
+
+    # The shared history comes first in the dest branch.
+    dest = source[:source_size // 2]
+    dest_messages: List[str] = []
+    for index in range(len(dest), size):
+        roll = rng.random()
+        if roll < cherry_pick_rate:
+            picked = rng.randrange(source_size)
+            message = (
+                f"{source_messages[picked]}\n\n"
+                f"(cherry picked from commit {source_shas[picked]})"
+            )
+        elif roll < cherry_pick_rate + collision_rate and dest_messages:
+            message = rng.choice(dest_messages)
+        else:
+            message = f"fix: dest change {index}\n\ndest body {index}"
+        dest_messages.append(message)
+        dest.append(raw_commit(
+            source_size + index, f'{rng.getrandbits(160):040x}', message
+        ))
+
+    return '\n'.join(source), '\n'.join(dest)
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process, in megabytes."""
+    # Only available on Unix, so don't break collecting the tests elsewhere.
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, while macOS reports bytes.
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak / 1024
+
+
+def write_logs(size: int, directory: str) -> Tuple[str, str]:
+    """Generate logs of the given size, and write them to files in the
+    directory, returning their paths."""
+    paths = (
+        os.path.join(directory, f'source-{size}.log'),
+        os.path.join(directory, f'dest-{size}.log'),
+    )
+    for path, raw_log in zip(paths, generate_logs(size)):
+        with open(path, 'w') as file:
+            file.write(raw_log)
+    return paths
+
+
+def measure(paths: Tuple[str, str], mode: str) -> Dict[str, float]:
+    """Parse and compare the logs written by write_logs(), returning how long
+    parsing and comparing took, and how much they raised the peak RSS over
+    that of just reading the logs."""
+    raw_source, raw_dest = (open(path).read() for path in paths)
+    baseline = peak_rss_mb()
+
+    # Garbage collection pauses grow with the number of live objects, which
+    # would make the timings look super-linear, so don't collect while timing
+    # (as timeit doesn't either).
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        source = CommitLog(raw_source)
+        dest = CommitLog(raw_dest)
+        parse = time.perf_counter() - started
+    finally:
+        gc.enable()
+    del raw_source, raw_dest
+
+    timer = timeit.Timer(lambda: MODES[mode](source, dest))
+    number, _ = timer.autorange()
+    compare = min(timer.repeat(REPEATS, number)) / number
+
+    return {
+        'parse': parse,
+        'compare': compare,
+        'rss_mb': peak_rss_mb() - baseline,
+    }
+
+
+def growth_exponent(sizes: List[int], times: List[float]) -> float:
+    """Fit time = a * size ** k by least squares on a log-log scale, and
+    return k. Linear growth gives k = 1."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum(
+        (x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)
+    ) / sum((x - mean_x) ** 2 for x in xs)
+
+
+@pytest.fixture(scope='module')
+def budget():
+    with open(BUDGET_PATH) as file:
+        return json.load(file)
+
+
+@pytest.mark.skipif(
+    not SIZES, reason="set BRANCH_DETECTIVE_SCALING to the sizes to measure"
+)
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_scaling(mode, budget, tmp_path):
+    # Generate the logs, and then measure each size, each in a fresh process,
+    # so that peak RSS isn't carried over.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        results = {}
+        for size in sorted(SIZES):
+            paths = pool.apply(write_logs, (size, str(tmp_path)))
+            results[size] = pool.apply(measure, (paths, mode))
+
+    print(
+        f"\n{mode:>20} {'size':>8} {'parse':>8} {'compare':>8} {'rss_mb':>8}"
+    )
+    for size, result in results.items():
+        print(
+            f"{mode:>20} {size:>8} {result['parse']:>8.3f} "
+            f"{result['compare']:>8.3f} {result['rss_mb']:>8.1f}"
+        )
+
+    for size, result in results.items():
+        limits = budget['sizes'].get(str(size))
+        if limits is None:
+            continue
+        assert result['parse'] + result['compare'] <= limits['seconds'], (
+            f"{mode}: {size} commits took longer than {limits['seconds']}s"
+        )
+        assert result['rss_mb'] <= limits['rss_mb'], (
+            f"{mode}: {size} commits used more than {limits['rss_mb']}MB"
+        )
+
+    sizes = list(results)
+    if sizes[-1] < sizes[0] * MIN_SPAN:
+        print(f"Not checking growth, as the sizes span less than {MIN_SPAN}x.")
+        return
+    for phase in ('parse', 'compare'):
+        exponent = growth_exponent(
+            sizes, [results[size][phase] for size in sizes]
+        )
+        print(f"{mode:>20} {phase} grows as size ** {exponent:.2f}")
+        assert exponent <= budget['max_exponent'], (
+            f"{mode}: {phase} time grows super-linearly "
+            f"(size ** {exponent:.2f})"
+        )
+
+
+def test_generate_logs():
+    raw_source, raw_dest = generate_logs(
+        1000, collision_rate=0.2, cherry_pick_rate=0.3, merge_rate=0.5
+    )
+    source = CommitLog(raw_source)
+    dest = CommitLog(raw_dest)
+
+    assert len(source) == 100
+    assert len(dest) == 1000
+    cherry_picks = sum(1 for commit in dest if commit.cherry_pick)
+    merges = sum(1 for commit in dest if commit.is_merge)
+    assert 200 < cherry_picks < 400
+    assert 400 < merges < 600
+    # Half the source commits are shared with dest, and the rest are only
+    # present if they were cherry picked.
+    missing = compare.find_missing_by_sha(source, dest)
+    assert len(missing) <= 50
+
+
+def test_growth_exponent():
+    sizes = [1000, 10000, 100000]
+    assert growth_exponent(sizes, [s * 1e-6 for s in sizes]) == pytest.approx(1)
+    assert growth_exponent(sizes, [s * s * 1e-9 for s in sizes]) == (
+        pytest.approx(2)
+    )